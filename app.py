@@ -1,14 +1,31 @@
+import eventlet
+eventlet.monkey_patch()
+from eventlet import tpool
+
 import os
-from flask import Flask, request, render_template_string, redirect, url_for, g, jsonify
+from flask import Flask, request, render_template, stream_template, redirect, url_for, g, jsonify
+from flask.json.provider import JSONProvider
+import orjson
 from dotenv import load_dotenv
+from jinja2 import ChoiceLoader, DictLoader
+from markupsafe import escape
 import sqlite3
 from flask_socketio import SocketIO, emit
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_compress import Compress
+from werkzeug.security import check_password_hash
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from datetime import datetime
+from collections import defaultdict
+import queue
+import uuid
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import base64
+import hashlib
+import hmac
 import logging
+import time
 
 logging.basicConfig(level=logging.DEBUG)
 print(f"LUMAAI_API_KEY: {os.getenv('LUMAAI_API_KEY')}")
@@ -16,19 +33,126 @@ print(f"LUMAAI_API_KEY: {os.getenv('LUMAAI_API_KEY')}")
 # Load environment variables
 load_dotenv()
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson's C encoder."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+class _orjson_shim:
+    """Module-style dumps/loads pair so Flask-SocketIO (and engineio
+    underneath) encode emit payloads with orjson instead of stdlib json."""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_secret_key_here'
+# Let browsers cache the split-out static CSS/JS for a day
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400
+app.json = OrjsonProvider(app)
+# Compress the board HTML and static assets on the wire; brotli when the
+# client accepts it, gzip otherwise, and skip tiny responses. The
+# streamed board page and file-wrapped static responses pick their
+# algorithm from COMPRESS_ALGORITHM_STREAMING, whose default leaves out
+# gzip — set it too so gzip-only clients don't get plaintext
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'text/css', 'text/javascript',
+                                    'application/javascript']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_ALGORITHM_STREAMING'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 512
+Compress(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
-socketio = SocketIO(app)
+# eventlet multiplexes socket I/O on one greenlet-per-connection hub; a
+# Redis message queue (if configured) keeps emits consistent across workers
+socketio = SocketIO(app, async_mode='eventlet', message_queue=os.getenv('REDIS_URL'),
+                    json=_orjson_shim)
 
 # Database setup
+DATABASE = 'message_board.db'
+POOL_SIZE = 8
+
+def _new_connection():
+    db = sqlite3.connect(DATABASE, check_same_thread=False, isolation_level=None,
+                         cached_statements=512)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.execute('PRAGMA cache_size=-20000')
+    db.execute('PRAGMA temp_store=MEMORY')
+    db.execute('PRAGMA mmap_size=268435456')
+    return db
+
+# Pool of reusable connections so requests don't pay the connect/schema-parse
+# cost every time; WAL mode lets readers run concurrently with a writer.
+_db_pool = queue.Queue(maxsize=POOL_SIZE)
+for _ in range(POOL_SIZE):
+    _db_pool.put(_new_connection())
+
 def get_db():
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect('message_board.db')
+        db = g._database = _db_pool.get()
     return db
 
+# Shared HTTP session so Stability/Luma calls reuse TCP+TLS connections
+# instead of handshaking on every request (the status endpoint is polled)
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
+# Password hashing is CPU-bound for hundreds of ms by design; run it on
+# eventlet's OS thread pool so a login/register burst doesn't stall the
+# greenlet hub (and websocket heartbeats) for the duration of the KDF.
+# New hashes are stored as pbkdf2$<iterations>$<salt>$<digest> and checked
+# with hashlib directly, skipping werkzeug's per-call header parsing;
+# hashes from older installs fall back to check_password_hash.
+PBKDF2_ITERATIONS = 260000
+
+def _pbkdf2_hash(password):
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS)
+    return f"pbkdf2${PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+def _pbkdf2_verify(stored_hash, password):
+    _, iterations, salt_hex, digest_hex = stored_hash.split('$')
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(),
+                                 bytes.fromhex(salt_hex), int(iterations))
+    return hmac.compare_digest(digest, bytes.fromhex(digest_hex))
+
+def hash_password(password):
+    return tpool.execute(_pbkdf2_hash, password)
+
+def verify_password(stored_hash, password):
+    if stored_hash.startswith('pbkdf2$'):
+        return tpool.execute(_pbkdf2_verify, stored_hash, password)
+    return tpool.execute(check_password_hash, stored_hash, password)
+
+# Generated images live on disk and only their path goes in the DB, so
+# feed queries stay small and the browser can cache images separately
+IMAGE_DIR = os.path.join(app.static_folder, 'img')
+os.makedirs(IMAGE_DIR, exist_ok=True)
+
+def save_image(image_b64):
+    image_bytes = base64.b64decode(image_b64)
+    filename = hashlib.sha256(image_bytes).hexdigest() + '.png'
+    path = os.path.join(IMAGE_DIR, filename)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(image_bytes)
+    return 'img/' + filename
+
 def generate_image_with_stability(prompt):
     api_key = os.getenv("STABILITY_API_KEY")
     if not api_key:
@@ -49,7 +173,7 @@ def generate_image_with_stability(prompt):
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = SESSION.post(url, headers=headers, json=payload)
         response.raise_for_status()
         data = response.json()
         image_data = data["artifacts"][0]["base64"]
@@ -76,7 +200,7 @@ def generate_video_with_luma(prompt, aspect_ratio="16:9"):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = SESSION.post(url, json=payload, headers=headers)
         response.raise_for_status()
         data = response.json()
         generation_id = data.get('id')
@@ -86,7 +210,25 @@ def generate_video_with_luma(prompt, aspect_ratio="16:9"):
         logging.error(f"Error in generate_video_with_luma: {str(e)}")
         return None, str(e)
 
+# Short-lived cache of Luma status responses so concurrent polls for the
+# same generation (multiple tabs, retries) share one upstream call.
+# Completed generations never change, so those entries are kept for good.
+VIDEO_STATUS_TTL = 2.0
+_video_status_cache = {}
+
 def get_video_status(generation_id):
+    cached = _video_status_cache.get(generation_id)
+    if cached is not None:
+        fetched_at, data = cached
+        if data.get('state') == 'completed' or time.time() - fetched_at < VIDEO_STATUS_TTL:
+            return data, None
+
+    data, error = _fetch_video_status(generation_id)
+    if data is not None:
+        _video_status_cache[generation_id] = (time.time(), data)
+    return data, error
+
+def _fetch_video_status(generation_id):
     api_key = os.getenv("LUMAAI_API_KEY")
     if not api_key:
         logging.error("Luma AI API key not set")
@@ -100,7 +242,7 @@ def get_video_status(generation_id):
 
     try:
         logging.debug(f"Sending request to Luma AI API: {url}")
-        response = requests.get(url, headers=headers)
+        response = SESSION.get(url, headers=headers)
         response.raise_for_status()
         data = response.json()
         logging.debug(f"Received response from Luma AI API: {data}")
@@ -111,15 +253,26 @@ def get_video_status(generation_id):
 
 @app.teardown_appcontext
 def close_connection(exception):
-    db = getattr(g, '_database', None)
+    # pop, not getattr: streamed responses tear the app context down a
+    # second time when the generator closes, and a stale g._database
+    # would put the same connection into the full pool twice — the
+    # second put blocks the streaming greenlet forever
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        # never return a connection mid-transaction (e.g. a BEGIN
+        # IMMEDIATE path that raised before committing)
+        db.rollback()
+        _db_pool.put(db)
 
 def init_db():
     with app.app_context():
         db = get_db()
         cursor = db.cursor()
-        
+
+        # One transaction for all DDL: a single fsync instead of one per
+        # autocommitted statement
+        cursor.execute('BEGIN IMMEDIATE')
+
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users
             (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -134,7 +287,7 @@ def init_db():
              user_id INTEGER,
              content TEXT NOT NULL,
              timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-             image_data TEXT,
+             image_path TEXT,
              video_id TEXT,
              video_url TEXT,
              FOREIGN KEY (user_id) REFERENCES users (id))
@@ -176,7 +329,36 @@ def init_db():
              FOREIGN KEY (user_id) REFERENCES users (id),
              UNIQUE(message_id, user_id, reaction))
         ''')
-        
+
+        # Older databases stored base64 image bytes in an image_data column
+        cursor.execute("PRAGMA table_info(messages)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if 'image_data' in columns and 'image_path' not in columns:
+            cursor.execute("ALTER TABLE messages RENAME COLUMN image_data TO image_path")
+
+        # Decode any leftover base64 values into files so old rows don't
+        # render as broken <img src="/static/<base64>"> tags; values that
+        # don't decode are cleared. Runs every startup but matches nothing
+        # once converted.
+        cursor.execute("SELECT id, image_path FROM messages "
+                       "WHERE image_path IS NOT NULL AND image_path NOT LIKE 'img/%'")
+        for row_id, legacy_b64 in cursor.fetchall():
+            try:
+                path = save_image(legacy_b64)
+            except (ValueError, OSError):
+                logging.error(f"Could not convert stored image for message {row_id}; clearing it")
+                path = None
+            cursor.execute("UPDATE messages SET image_path = ? WHERE id = ?", (path, row_id))
+
+        # Indexes for the feed ordering and the per-message joins so they
+        # become B-tree seeks instead of full scans
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages(timestamp DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_mid ON comments(message_id, timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_reactions_mid ON reactions(message_id, reaction)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_mt_mid ON message_tags(message_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_mt_tid ON message_tags(tag_id)')
+        cursor.execute('ANALYZE')
+
         db.commit()
 
 init_db()
@@ -191,104 +373,211 @@ class User(UserMixin):
 def load_user(user_id):
     db = get_db()
     cursor = db.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    cursor.execute(SQL_SELECT_USER_BY_ID, (user_id,))
     user = cursor.fetchone()
     if user:
-        return User(user[0], user[1], user[3])
+        return User(user[0], user[1], user[2])
     return None
 
+# Hot SQL hoisted to module-level constants so repeated executes hit the
+# same string and reuse the per-connection compiled-statement cache.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+SQL_SELECT_MESSAGES = '''
+    SELECT messages.id, messages.content, messages.image_path, messages.video_url, messages.timestamp, users.username, users.avatar
+    FROM messages
+    JOIN users ON messages.user_id = users.id
+    WHERE (? IS NULL OR messages.id < ?)
+    ORDER BY messages.id DESC
+    LIMIT ?
+'''
+
+SQL_SELECT_MESSAGES_BY_TAG = '''
+    SELECT messages.id, messages.content, messages.image_path, messages.video_url, messages.timestamp, users.username, users.avatar
+    FROM messages
+    JOIN users ON messages.user_id = users.id
+    JOIN message_tags ON messages.id = message_tags.message_id
+    JOIN tags ON message_tags.tag_id = tags.id
+    WHERE tags.name = ?
+    AND (? IS NULL OR messages.id < ?)
+    ORDER BY messages.id DESC
+    LIMIT ?
+'''
+
+SQL_POPULAR_TAGS = '''
+    SELECT tags.name, COUNT(*) as tag_count
+    FROM tags
+    JOIN message_tags ON tags.id = message_tags.tag_id
+    GROUP BY tags.id
+    ORDER BY tag_count DESC
+    LIMIT 10
+'''
+
+SQL_SELECT_USER_BY_ID = "SELECT id, username, avatar FROM users WHERE id = ?"
+
+SQL_INSERT_REACTION = '''
+    INSERT INTO reactions (message_id, user_id, reaction)
+    VALUES (?, ?, ?)
+    ON CONFLICT(message_id, user_id, reaction) DO UPDATE SET reaction = excluded.reaction
+'''
+
+SQL_REACTION_COUNTS = '''
+    SELECT reaction, COUNT(*) as count
+    FROM reactions
+    WHERE message_id = ?
+    GROUP BY reaction
+'''
+
+# The tag cloud changes on the timescale of posts, not page loads; cache
+# the aggregate for a short window and invalidate when tags are written
+POPULAR_TAGS_TTL = 30.0
+_popular_tags_cache = (0.0, [])
+
+def get_popular_tags(cursor):
+    global _popular_tags_cache
+    fetched_at, tags = _popular_tags_cache
+    if time.time() - fetched_at < POPULAR_TAGS_TTL:
+        return tags
+    cursor.execute(SQL_POPULAR_TAGS)
+    tags = cursor.fetchall()
+    _popular_tags_cache = (time.time(), tags)
+    return tags
+
+def invalidate_popular_tags():
+    global _popular_tags_cache
+    _popular_tags_cache = (0.0, [])
+
+def render_message_fragments(content, username, avatar, timestamp, tags):
+    """Pre-render the per-message HTML pushed to clients.
+
+    Escaping and markup assembly happen once here, so every connected
+    browser can drop the fragments in with innerHTML instead of
+    rebuilding the same strings per field in JS."""
+    profile_href = url_for('profile', username=username)
+    return {
+        'content_html': '<div class="message-content">%s</div>' % escape(content),
+        'meta_html': (
+            '<div class="message-meta"><span class="avatar">%s</span>'
+            'Posted by <a href="%s">%s</a> on %s</div>'
+            % (escape(avatar), escape(profile_href), escape(username), escape(timestamp))
+        ),
+        'tags_html': '<div class="message-tags">%s</div>' % ''.join(
+            '<span class="tag">%s</span>' % escape(tag) for tag in tags),
+    }
+
+def enrich_messages(cursor, messages):
+    """Attach comments, tags, and reaction counts to each message row
+    using one bulk query per relation instead of three queries per message."""
+    if not messages:
+        return messages
+
+    ids = [message[0] for message in messages]
+    placeholders = ','.join('?' * len(ids))
+
+    cursor.execute(f'''
+        SELECT comments.message_id, comments.content, comments.timestamp, users.username, users.avatar
+        FROM comments
+        JOIN users ON comments.user_id = users.id
+        WHERE comments.message_id IN ({placeholders})
+        ORDER BY comments.timestamp ASC
+    ''', ids)
+    comments_by_mid = defaultdict(list)
+    for row in cursor:
+        comments_by_mid[row[0]].append(row[1:])
+
+    cursor.execute(f'''
+        SELECT message_tags.message_id, tags.name
+        FROM tags
+        JOIN message_tags ON tags.id = message_tags.tag_id
+        WHERE message_tags.message_id IN ({placeholders})
+    ''', ids)
+    tags_by_mid = defaultdict(list)
+    for mid, name in cursor:
+        tags_by_mid[mid].append(name)
+
+    cursor.execute(f'''
+        SELECT message_id, reaction, COUNT(*) as count
+        FROM reactions
+        WHERE message_id IN ({placeholders})
+        GROUP BY message_id, reaction
+    ''', ids)
+    reactions_by_mid = defaultdict(dict)
+    for mid, reaction, count in cursor:
+        reactions_by_mid[mid][reaction] = count
+
+    # Lazy so streaming renders can emit each row as soon as it's built
+    return (message + (comments_by_mid[message[0]], tags_by_mid[message[0]], reactions_by_mid[message[0]])
+            for message in messages)
+
+def get_page_params():
+    """Read the keyset-pagination query params shared by the feed routes.
+
+    The cursor is a message id rather than a timestamp: CURRENT_TIMESTAMP
+    has one-second resolution, so same-second posts share a timestamp key
+    and pages keyed on it skip rows; ids are monotonic and unique."""
+    before = request.args.get('before', type=int)
+    try:
+        # Clamp both ends: SQLite treats LIMIT -1 (or any negative) as
+        # unlimited, which would defeat the page-size cap
+        limit = max(1, min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return before, limit
+
 @app.route('/')
 def index():
+    before, limit = get_page_params()
     db = get_db()
     cursor = db.cursor()
-    cursor.execute('''
-        SELECT messages.id, messages.content, messages.image_data, messages.video_url, messages.timestamp, users.username, users.avatar
-        FROM messages
-        JOIN users ON messages.user_id = users.id
-        ORDER BY messages.timestamp DESC
-    ''')
+    cursor.execute(SQL_SELECT_MESSAGES, (before, before, limit))
     messages = cursor.fetchall()
+
+    messages = enrich_messages(cursor, messages)
+
+    popular_tags = get_popular_tags(cursor)
     
-    for i, message in enumerate(messages):
-        cursor.execute('''
-            SELECT comments.content, comments.timestamp, users.username, users.avatar
-            FROM comments
-            JOIN users ON comments.user_id = users.id
-            WHERE comments.message_id = ?
-            ORDER BY comments.timestamp ASC
-        ''', (message[0],))
-        comments = cursor.fetchall()
-        
-        cursor.execute('''
-            SELECT tags.name
-            FROM tags
-            JOIN message_tags ON tags.id = message_tags.tag_id
-            WHERE message_tags.message_id = ?
-        ''', (message[0],))
-        tags = [tag[0] for tag in cursor.fetchall()]
-        
-        cursor.execute('''
-            SELECT reaction, COUNT(*) as count
-            FROM reactions
-            WHERE message_id = ?
-            GROUP BY reaction
-        ''', (message[0],))
-        reactions = dict(cursor.fetchall())
-        
-        messages[i] = message + (comments, tags, reactions)
-    
-    cursor.execute('''
-        SELECT tags.name, COUNT(*) as tag_count
-        FROM tags
-        JOIN message_tags ON tags.id = message_tags.tag_id
-        GROUP BY tags.id
-        ORDER BY tag_count DESC
-        LIMIT 10
-    ''')
-    popular_tags = cursor.fetchall()
-    
-    return render_template_string(BASE_HTML, messages=messages, popular_tags=popular_tags)
+    return stream_template('board.html', messages=messages, popular_tags=popular_tags)
 
 @app.route('/post_message', methods=['POST'])
 @login_required
 def post_message():
     content = request.form.get('content')
-    tags = request.form.get('tags', '').split(',')
-    image_data = request.form.get('image_data')
+    tags = sorted({t.strip().lower() for t in request.form.get('tags', '').split(',') if t.strip()})
+    image_path = request.form.get('image_path')
     video_id = request.form.get('video_id')
     
     logging.info(f"Posting message. Content: {content[:50]}..., Video ID: {video_id}")
     
-    if content or image_data or video_id:
+    if content or image_path or video_id:
         db = get_db()
         cursor = db.cursor()
-        
-        # If there's a video_id, get the video_url
-        video_url = None
-        if video_id:
-            data, error = get_video_status(video_id)
-            if not error and data.get('state') == 'completed':
-                video_url = data.get('assets', {}).get('video')
-        
-        cursor.execute("INSERT INTO messages (user_id, content, image_data, video_id, video_url) VALUES (?, ?, ?, ?, ?)",
-                       (current_user.id, content, image_data, video_id, video_url))
+        # Group the message and tag inserts into one write transaction so
+        # the request pays a single WAL fsync at commit
+        cursor.execute('BEGIN IMMEDIATE')
+
+        # The video URL is resolved by a background poller; don't make the
+        # user's POST wait on a Luma round trip that is rarely done anyway
+        cursor.execute("INSERT INTO messages (user_id, content, image_path, video_id, video_url) VALUES (?, ?, ?, ?, ?)",
+                       (current_user.id, content, image_path, video_id, None))
         message_id = cursor.lastrowid
         
         logging.info(f"Message inserted. ID: {message_id}")
         
-        for tag in tags:
-            tag = tag.strip().lower()
-            if tag:
-                cursor.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (tag,))
-                cursor.execute("SELECT id FROM tags WHERE name = ?", (tag,))
-                tag_id = cursor.fetchone()[0]
-                cursor.execute("INSERT INTO message_tags (message_id, tag_id) VALUES (?, ?)",
-                               (message_id, tag_id))
+        if tags:
+            cursor.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)",
+                               [(tag,) for tag in tags])
+            placeholders = ','.join('?' * len(tags))
+            cursor.execute(f"SELECT id FROM tags WHERE name IN ({placeholders})", tags)
+            tag_ids = [row[0] for row in cursor.fetchall()]
+            cursor.executemany("INSERT OR IGNORE INTO message_tags (message_id, tag_id) VALUES (?, ?)",
+                               [(message_id, tag_id) for tag_id in tag_ids])
+            invalidate_popular_tags()
         
         db.commit()
         
         cursor.execute('''
-            SELECT messages.id, messages.content, messages.image_data, messages.video_url, messages.timestamp, users.username, users.avatar
+            SELECT messages.id, messages.content, messages.image_path, messages.video_url, messages.timestamp, users.username, users.avatar
             FROM messages
             JOIN users ON messages.user_id = users.id
             WHERE messages.id = ?
@@ -297,43 +586,187 @@ def post_message():
         
         logging.info(f"Emitting new message. ID: {new_message[0]}, Video URL: {new_message[3]}")
         
-        socketio.emit('new_message', {
+        payload = {
             'id': new_message[0],
             'content': new_message[1],
-            'image_data': new_message[2],
+            'image_path': new_message[2],
             'video_url': new_message[3],
             'timestamp': new_message[4],
             'username': new_message[5],
             'avatar': new_message[6],
             'tags': tags,
             'reactions': {}
-        })
+        }
+        payload.update(render_message_fragments(
+            new_message[1], new_message[5], new_message[6], new_message[4], tags))
+        emit_batched('new_message', payload)
+
+        if video_id:
+            socketio.start_background_task(poll_video_until_done, video_id, message_id)
     return redirect(url_for('index'))
 
+# How long a background poller keeps retrying a generation before giving
+# up; without a bound, a bad video id or a Luma outage leaves an immortal
+# greenlet polling every 30s for the life of the process
+VIDEO_POLL_DEADLINE = 30 * 60
+
+def poll_video_until_done(video_id, message_id):
+    """Poll Luma with exponential backoff until the generation finishes,
+    then store the video URL and push it to clients."""
+    delay = 1
+    deadline = time.time() + VIDEO_POLL_DEADLINE
+    while time.time() < deadline:
+        data, error = get_video_status(video_id)
+        if not error and data is not None:
+            state = data.get('state')
+            if state == 'completed':
+                video_url = data.get('assets', {}).get('video')
+                if video_url:
+                    with app.app_context():
+                        db = get_db()
+                        db.execute("UPDATE messages SET video_url = ? WHERE id = ?",
+                                   (video_url, message_id))
+                        db.commit()
+                    logging.info(f"Video ready for message {message_id}: {video_url}")
+                    socketio.emit('video_ready', {
+                        'message_id': message_id,
+                        'video_url': video_url
+                    })
+                return
+            if state == 'failed':
+                logging.error(f"Video generation {video_id} failed")
+                return
+        socketio.sleep(delay)
+        delay = min(delay * 2, 30)
+    logging.error(f"Gave up polling video {video_id} for message {message_id} "
+                  f"after {VIDEO_POLL_DEADLINE}s")
+
+# High-rate board events (messages, comments, reactions) are buffered for
+# a few milliseconds and flushed as one 'batch' emit, so a burst of
+# activity costs a single socket frame instead of one per event.
+EMIT_FLUSH_INTERVAL = 0.005
+_emit_queue = []
+_emit_flusher_running = False
+
+def emit_batched(event_type, payload):
+    global _emit_flusher_running
+    _emit_queue.append({'type': event_type, 'payload': payload})
+    if not _emit_flusher_running:
+        _emit_flusher_running = True
+        socketio.start_background_task(_flush_emits)
+
+def _flush_emits():
+    global _emit_flusher_running
+    while _emit_queue:
+        socketio.sleep(EMIT_FLUSH_INTERVAL)
+        batch, _emit_queue[:] = list(_emit_queue), []
+        socketio.emit('batch', batch)
+    _emit_flusher_running = False
+
+# Job results for in-flight generation requests, keyed by job id.  The
+# routes return a job id immediately and the background task pushes the
+# result over SocketIO so API latency never blocks a worker greenlet;
+# /job_status/<job_id> serves clients that missed the push.  Insertion
+# order is eviction order, so the dict stays bounded.
+generation_jobs = {}
+MAX_JOB_RESULTS = 1000
+
+def store_job_result(job_id, result):
+    generation_jobs[job_id] = result
+    while len(generation_jobs) > MAX_JOB_RESULTS:
+        generation_jobs.pop(next(iter(generation_jobs)))
+
+def run_image_job(job_id, prompt):
+    image_data, error = generate_image_with_stability(prompt)
+    image_path = save_image(image_data) if image_data else None
+    store_job_result(job_id, {"image_path": image_path, "error": error})
+    socketio.emit('image_ready', {
+        'job_id': job_id,
+        'image_path': image_path,
+        'error': error
+    })
+
+def run_video_job(job_id, prompt, aspect_ratio):
+    generation_id, error = generate_video_with_luma(prompt, aspect_ratio)
+    store_job_result(job_id, {"generation_id": generation_id, "error": error})
+    if error:
+        logging.error(f"Error generating video: {error}")
+    else:
+        logging.info(f"Video generation started. Generation ID: {generation_id}")
+    socketio.emit('video_started', {
+        'job_id': job_id,
+        'generation_id': generation_id,
+        'error': error
+    })
+    if error:
+        return
+
+    # Keep polling server-side and push the finished preview to clients,
+    # so the browser doesn't have to hammer /check_video_status
+    delay = 2
+    deadline = time.time() + VIDEO_POLL_DEADLINE
+    while time.time() < deadline:
+        socketio.sleep(delay)
+        delay = min(delay * 2, 30)
+        data, status_error = get_video_status(generation_id)
+        if status_error or data is None:
+            continue
+        state = data.get('state')
+        if state == 'completed':
+            video_url = data.get('assets', {}).get('video')
+            socketio.emit('video_generation_done', {
+                'job_id': job_id,
+                'generation_id': generation_id,
+                'video_url': video_url
+            })
+            return
+        if state == 'failed':
+            socketio.emit('video_generation_done', {
+                'job_id': job_id,
+                'generation_id': generation_id,
+                'video_url': None,
+                'error': 'Video generation failed'
+            })
+            return
+    logging.error(f"Gave up polling generation {generation_id} for job {job_id} "
+                  f"after {VIDEO_POLL_DEADLINE}s")
+    socketio.emit('video_generation_done', {
+        'job_id': job_id,
+        'generation_id': generation_id,
+        'video_url': None,
+        'error': 'Video generation timed out'
+    })
+
+@app.route('/job_status/<job_id>')
+@login_required
+def job_status(job_id):
+    """Poll fallback for clients that missed the SocketIO push; a job
+    not (or no longer) in the table reads as still pending."""
+    result = generation_jobs.get(job_id)
+    if result is None:
+        return jsonify({"status": "pending"})
+    return jsonify(dict(result, status="done"))
+
 @app.route('/generate_image', methods=['POST'])
 @login_required
 def generate_image():
     prompt = request.form.get('prompt')
-    image_data, error = generate_image_with_stability(prompt)
-    
-    if error:
-        return jsonify({"error": error}), 500
-    
-    return jsonify({"image_data": image_data})
+    job_id = uuid.uuid4().hex
+    socketio.start_background_task(run_image_job, job_id, prompt)
+    return jsonify({"job_id": job_id})
 
 @app.route('/generate_video', methods=['POST'])
 @login_required
 def generate_video():
     prompt = request.form.get('prompt')
     aspect_ratio = request.form.get('aspect_ratio', '16:9')
-    generation_id, error = generate_video_with_luma(prompt, aspect_ratio)
-    
-    if error:
-        logging.error(f"Error generating video: {error}")
-        return jsonify({"error": error}), 500
-    
-    logging.info(f"Video generation started. Generation ID: {generation_id}")
-    return jsonify({"generation_id": generation_id})
+    job_id = uuid.uuid4().hex
+    socketio.start_background_task(run_video_job, job_id, prompt, aspect_ratio)
+    return jsonify({"job_id": job_id})
+
+# Generation ids whose video_url has already been written, so completed
+# polls can skip the DB entirely
+_finalized_video_ids = set()
 
 @app.route('/check_video_status/<generation_id>')
 @login_required
@@ -355,11 +788,15 @@ def check_video_status(generation_id):
     logging.info(f"Video status for generation {generation_id}: {status}")
     logging.info(f"Video URL: {video_url}")
     
-    if status == 'completed' and video_url:
+    if status == 'completed' and video_url and generation_id not in _finalized_video_ids:
         db = get_db()
         cursor = db.cursor()
-        cursor.execute("UPDATE messages SET video_url = ? WHERE video_id = ?", (video_url, generation_id))
+        # Only rows that still lack the URL - repeated polls after
+        # completion shouldn't keep taking the write lock
+        cursor.execute("UPDATE messages SET video_url = ? WHERE video_id = ? AND (video_url IS NULL OR video_url <> ?)",
+                       (video_url, generation_id, video_url))
         db.commit()
+        _finalized_video_ids.add(generation_id)
         logging.info(f"Updated video URL in database for generation {generation_id}")
     
     return jsonify({
@@ -370,48 +807,41 @@ def check_video_status(generation_id):
 
 @app.route('/tag/<tag_name>')
 def view_tag(tag_name):
+    before, limit = get_page_params()
     db = get_db()
     cursor = db.cursor()
-    cursor.execute('''
-        SELECT messages.id, messages.content, messages.image_data, messages.video_url, messages.timestamp, users.username, users.avatar
-        FROM messages
-        JOIN users ON messages.user_id = users.id
-        JOIN message_tags ON messages.id = message_tags.message_id
-        JOIN tags ON message_tags.tag_id = tags.id
-        WHERE tags.name = ?
-        ORDER BY messages.timestamp DESC
-    ''', (tag_name,))
+    cursor.execute(SQL_SELECT_MESSAGES_BY_TAG, (tag_name, before, before, limit))
     messages = cursor.fetchall()
-    
-    for i, message in enumerate(messages):
-        cursor.execute('''
-            SELECT comments.content, comments.timestamp, users.username, users.avatar
-            FROM comments
-            JOIN users ON comments.user_id = users.id
-            WHERE comments.message_id = ?
-            ORDER BY comments.timestamp ASC
-        ''', (message[0],))
-        comments = cursor.fetchall()
-        
-        cursor.execute('''
-            SELECT tags.name
-            FROM tags
-            JOIN message_tags ON tags.id = message_tags.tag_id
-            WHERE message_tags.message_id = ?
-        ''', (message[0],))
-        tags = [tag[0] for tag in cursor.fetchall()]
-        
-        cursor.execute('''
-            SELECT reaction, COUNT(*) as count
-            FROM reactions
-            WHERE message_id = ?
-            GROUP BY reaction
-        ''', (message[0],))
-        reactions = dict(cursor.fetchall())
-        
-        messages[i] = message + (comments, tags, reactions)
-    
-    return render_template_string(BASE_HTML, messages=messages, current_tag=tag_name)
+
+    messages = enrich_messages(cursor, messages)
+
+    return stream_template('board.html', messages=messages, current_tag=tag_name)
+
+@app.route('/load_more')
+def load_more():
+    before, limit = get_page_params()
+    tag = request.args.get('tag') or None
+    db = get_db()
+    cursor = db.cursor()
+    if tag:
+        cursor.execute(SQL_SELECT_MESSAGES_BY_TAG, (tag, before, before, limit))
+    else:
+        cursor.execute(SQL_SELECT_MESSAGES, (before, before, limit))
+    messages = enrich_messages(cursor, cursor.fetchall())
+
+    return jsonify([dict({
+        'id': m[0],
+        'content': m[1],
+        'image_path': m[2],
+        'video_url': m[3],
+        'timestamp': m[4],
+        'username': m[5],
+        'avatar': m[6],
+        'comments': [{'content': c[0], 'timestamp': c[1], 'username': c[2], 'avatar': c[3]}
+                     for c in m[7]],
+        'tags': m[8],
+        'reactions': m[9]
+    }, **render_message_fragments(m[1], m[5], m[6], m[4], m[8])) for m in messages])
 
 @app.route('/post_comment/<int:message_id>', methods=['POST'])
 @login_required
@@ -433,14 +863,16 @@ def post_comment(message_id):
         ''', (comment_id,))
         new_comment = cursor.fetchone()
         
-        socketio.emit('new_comment', {
+        emit_batched('new_comment', {
             'message_id': message_id,
             'content': new_comment[0],
             'timestamp': new_comment[1],
             'username': new_comment[2],
             'avatar': new_comment[3]
         })
-    return redirect(url_for('index'))
+    # Comment forms submit over fetch; the new_comment broadcast renders
+    # the result, so there is nothing useful to send back
+    return '', 204
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -449,14 +881,14 @@ def login():
         password = request.form.get('password')
         db = get_db()
         cursor = db.cursor()
-        cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+        cursor.execute("SELECT id, username, password, avatar FROM users WHERE username = ?", (username,))
         user = cursor.fetchone()
-        if user and check_password_hash(user[2], password):
+        if user and verify_password(user[2], password):
             user_obj = User(user[0], user[1], user[3])
             login_user(user_obj)
             return redirect(url_for('index'))
         return "Invalid username or password"
-    return render_template_string(LOGIN_HTML)
+    return render_template('login.html')
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -466,14 +898,14 @@ def register():
         avatar = request.form.get('avatar')
         db = get_db()
         cursor = db.cursor()
-        cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+        cursor.execute("SELECT 1 FROM users WHERE username = ?", (username,))
         if cursor.fetchone():
             return "Username already exists"
         cursor.execute("INSERT INTO users (username, password, avatar) VALUES (?, ?, ?)",
-                       (username, generate_password_hash(password), avatar))
+                       (username, hash_password(password), avatar))
         db.commit()
         return redirect(url_for('login'))
-    return render_template_string(REGISTER_HTML)
+    return render_template('register.html')
 
 @app.route('/logout')
 @login_required
@@ -490,15 +922,21 @@ def profile(username):
     if user is None:
         return "User not found", 404
     
+    before, limit = get_page_params()
     cursor.execute('''
-        SELECT messages.id, messages.content, messages.image_data, messages.video_url, messages.timestamp
+        SELECT messages.id, messages.content, messages.image_path, messages.video_url, messages.timestamp
         FROM messages
         WHERE messages.user_id = ?
-        ORDER BY messages.timestamp DESC
-    ''', (user[0],))
+          AND (? IS NULL OR messages.id < ?)
+        ORDER BY messages.id DESC
+        LIMIT ?
+    ''', (user[0], before, before, limit))
     messages = cursor.fetchall()
-    
-    return render_template_string(PROFILE_HTML, user=user, messages=messages)
+
+    # Keyset link to the next page: older than the last row on this one
+    older_before = messages[-1][0] if len(messages) == limit else None
+    return render_template('profile.html', user=user, messages=messages,
+                           older_before=older_before)
 
 @app.route('/add_reaction/<int:message_id>/<reaction>')
 @login_required
@@ -506,22 +944,13 @@ def add_reaction(message_id, reaction):
     db = get_db()
     cursor = db.cursor()
     try:
-        cursor.execute('''
-            INSERT INTO reactions (message_id, user_id, reaction)
-            VALUES (?, ?, ?)
-            ON CONFLICT(message_id, user_id, reaction) DO UPDATE SET reaction = excluded.reaction
-        ''', (message_id, current_user.id, reaction))
+        cursor.execute(SQL_INSERT_REACTION, (message_id, current_user.id, reaction))
         db.commit()
-        
-        cursor.execute('''
-            SELECT reaction, COUNT(*) as count
-            FROM reactions
-            WHERE message_id = ?
-            GROUP BY reaction
-        ''', (message_id,))
+
+        cursor.execute(SQL_REACTION_COUNTS, (message_id,))
         reactions = dict(cursor.fetchall())
         
-        socketio.emit('reaction_update', {
+        emit_batched('reaction_update', {
             'message_id': message_id,
             'reactions': reactions
         })
@@ -554,103 +983,9 @@ BASE_HTML = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Rad Message Board</title>
-    <style>
-        :root {
-            --bg-color: #000;
-            --text-color: #fff;
-            --border-color: #fff;
-            --input-bg-color: #000;
-            --input-text-color: #fff;
-            --button-bg-color: #fff;
-            --button-text-color: #000;
-            --tag-bg-color: #fff;
-            --tag-text-color: #000;
-        }
-        body {
-            font-family: 'Courier New', monospace;
-            background-color: var(--bg-color);
-            color: var(--text-color);
-            margin: 0;
-            padding: 20px;
-            transition: background-color 0.3s, color 0.3s;
-        }
-        .container {
-            max-width: 800px;
-            margin: 0 auto;
-        }
-        h1, h2 {
-            border-bottom: 4px solid var(--border-color);
-            padding-bottom: 10px;
-        }
-        .message, .comment {
-            border: 4px solid var(--border-color);
-            padding: 10px;
-            margin-bottom: 20px;
-        }
-        .message-content, .comment-content {
-            margin-bottom: 10px;
-            word-wrap: break-word;
-        }
-        .message-meta, .comment-meta {
-            font-size: 0.8em;
-            color: #ccc;
-            margin-bottom: 10px;
-        }
-        form {
-            margin-bottom: 20px;
-        }
-        input[type="text"], textarea {
-            width: calc(100% - 24px);
-            padding: 10px;
-            margin-bottom: 10px;
-            background-color: var(--input-bg-color);
-            color: var(--input-text-color);
-            border: 2px solid var(--border-color);
-        }
-        input[type="submit"], button {
-            background-color: var(--button-bg-color);
-            color: var(--button-text-color);
-            border: none;
-            padding: 10px 20px;
-            cursor: pointer;
-        }
-        .nav {
-            margin-bottom: 20px;
-        }
-        .nav a {
-            color: var(--text-color);
-            margin-right: 10px;
-        }
-        .comments-section {
-            margin-top: 10px;
-            padding-top: 10px;
-            border-top: 2px solid var(--border-color);
-        }
-        .avatar {
-            font-size: 1.5em;
-            margin-right: 5px;
-        }
-        .tag {
-            display: inline-block;
-            background-color: var(--tag-bg-color);
-            color: var(--tag-text-color);
-            padding: 2px 5px;
-            margin-right: 5px;
-            font-size: 0.8em;
-        }
-        .tag-cloud {
-            margin-bottom: 20px;
-        }
-        #generated-image, #generated-video {
-            max-width: 100%;
-            height: auto;
-            margin-top: 10px;
-        }
-        .video-container {
-            margin-top: 10px;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ url_for('static', filename='board.css') }}">
     <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.js"></script>
+    <script src="{{ url_for('static', filename='board-socket.js') }}"></script>
 </head>
 <body>
     <div class="container">
@@ -681,7 +1016,7 @@ BASE_HTML = '''
             <input type="text" id="image-prompt" placeholder="Image generation prompt">
             <button type="button" onclick="generateImage()">Generate Image</button>
             <img id="generated-image" src="" alt="Generated Image" style="display:none;">
-            <input type="hidden" id="image-data" name="image_data">
+            <input type="hidden" id="image-path" name="image_path">
             
             <input type="text" id="video-prompt" placeholder="Video generation prompt">
             <select id="video-aspect-ratio">
@@ -703,7 +1038,7 @@ BASE_HTML = '''
                 <div class="message" data-message-id="{{ message[0] }}">
                     <div class="message-content">{{ message[1] }}</div>
                     {% if message[2] %}
-                        <img src="data:image/png;base64,{{ message[2] }}" alt="Generated Image" style="max-width: 100%; height: auto;">
+                        <img src="{{ url_for('static', filename=message[2]) }}" alt="Generated Image" loading="lazy" decoding="async" style="max-width: 100%; height: auto;">
                     {% endif %}
                     {% if message[3] %}
                         <div class="video-container">
@@ -723,7 +1058,7 @@ BASE_HTML = '''
                     {% endif %}
                     <div class="reactions">
                         {% for reaction, count in message[9].items() %}
-                            <button onclick="addReaction({{ message[0] }}, '{{ reaction }}')">{{ reaction }} {{ count }}</button>
+                            <button data-message-id="{{ message[0] }}" data-reaction="{{ reaction }}">{{ reaction }} {{ count }}</button>
                         {% endfor %}
                     </div>
                     {% if message[7] %}
@@ -749,167 +1084,13 @@ BASE_HTML = '''
                 </div>
             {% endfor %}
         </div>
+        <button id="load-more" onclick="loadMore()">Load More</button>
     </div>
 
     <script>
-        const socket = io();
-
-        function generateImage() {
-            const prompt = document.getElementById('image-prompt').value;
-            fetch('/generate_image', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: 'prompt=' + encodeURIComponent(prompt)
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.error) {
-                    alert('Error: ' + data.error);
-                } else {
-                    const img = document.getElementById('generated-image');
-                    img.src = 'data:image/png;base64,' + data.image_data;
-                    img.style.display = 'block';
-                    document.getElementById('image-data').value = data.image_data;
-                }
-            })
-            .catch(error => console.error('Error:', error));
-        }
-        
-        function generateVideo() {
-            const prompt = document.getElementById('video-prompt').value;
-            const aspectRatio = document.getElementById('video-aspect-ratio').value;
-            fetch('/generate_video', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: 'prompt=' + encodeURIComponent(prompt) + '&aspect_ratio=' + encodeURIComponent(aspectRatio)
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.error) {
-                    alert('Error: ' + data.error);
-                } else {
-                    document.getElementById('video-id').value = data.generation_id;
-                    checkVideoStatus(data.generation_id);
-                }
-            })
-            .catch(error => console.error('Error:', error));
-        }
-        
-        function checkVideoStatus(generationId) {
-    fetch('/check_video_status/' + generationId)
-    .then(response => response.json())
-    .then(data => {
-        if (data.error) {
-            console.error('Error:', data.error);
-            document.getElementById('video-status').textContent = 'Error: ' + data.error;
-        } else {
-            console.log('Video status:', data.status);
-            document.getElementById('video-status').textContent = 'Video status: ' + data.status;
-            
-            if (data.status === 'completed' && data.video_url) {
-                const video = document.getElementById('generated-video');
-                video.src = data.video_url;
-                video.style.display = 'block';
-                document.getElementById('video-status').textContent = 'Video generation completed!';
-            } else if (data.status === 'dreaming' || data.status === 'processing') {
-                setTimeout(() => checkVideoStatus(generationId), 5000);
-            } else {
-                console.warn('Unexpected video status:', data.status);
-            }
-        }
-    })
-    .catch(error => {
-        console.error('Error:', error);
-        document.getElementById('video-status').textContent = 'An error occurred while checking the video status';
-    });
-}
-        
-        function addReaction(messageId, reaction) {
-            fetch(`/add_reaction/${messageId}/${reaction}`, {method: 'GET'})
-                .then(response => {
-                    if (!response.ok) {
-                        throw new Error('Network response was not ok');
-                    }
-                })
-                .catch(error => console.error('Error:', error));
-        }
-
-        function createMessageElement(message) {
-    console.log("Creating message element:", message);
-    const messageElement = document.createElement('div');
-    messageElement.className = 'message';
-    messageElement.dataset.messageId = message.id;
-    messageElement.innerHTML = `
-        <div class="message-content">${message.content}</div>
-        ${message.image_data ? `<img src="data:image/png;base64,${message.image_data}" alt="Generated Image" style="max-width: 100%; height: auto;">` : ''}
-        ${message.video_url ? `<div class="video-container"><video src="${message.video_url}" controls style="max-width: 100%; height: auto;"></video></div>` : ''}
-        <div class="message-meta">
-            <span class="avatar">${message.avatar}</span>
-            Posted by ${message.username} on ${message.timestamp}
-        </div>
-        <div class="message-tags">
-            ${message.tags.map(tag => `<span class="tag">${tag}</span>`).join('')}
-        </div>
-        <div class="reactions"></div>
-        <div class="comments-section"></div>
-        <form class="comment-form" action="/post_comment/${message.id}" method="post">
-            <input type="text" name="content" placeholder="Add a comment" required>
-            <input type="submit" value="Post Comment">
-        </form>
-    `;
-    console.log("Message element created:", messageElement.outerHTML);
-    
-    if (message.video_id && !message.video_url) {
-        checkVideoStatus(message.video_id, messageElement);
-    }
-    
-    return messageElement;
-}
-
-socket.on('new_message', function(message) {
-    console.log("Received new message:", message);
-    const messagesContainer = document.getElementById('messages-container');
-    const newMessageElement = createMessageElement(message);
-    messagesContainer.insertBefore(newMessageElement, messagesContainer.firstChild);
-});
-        
-        socket.on('new_comment', function(comment) {
-            const messageElement = document.querySelector(`[data-message-id="${comment.message_id}"]`);
-            if (messageElement) {
-                const commentsSection = messageElement.querySelector('.comments-section');
-                const newCommentElement = document.createElement('div');
-                newCommentElement.className = 'comment';
-                newCommentElement.innerHTML = `
-                    <div class="comment-content">${comment.content}</div>
-                    <div class="comment-meta">
-                        <span class="avatar">${comment.avatar}</span>
-                        Posted by ${comment.username} on ${comment.timestamp}
-                    </div>
-                `;
-                commentsSection.appendChild(newCommentElement);
-            }
-        });
-
-        socket.on('reaction_update', function(data) {
-            const messageElement = document.querySelector(`[data-message-id="${data.message_id}"]`);
-            if (messageElement) {
-                const reactionsElement = messageElement.querySelector('.reactions');
-                if (reactionsElement) {
-                    reactionsElement.innerHTML = '';
-                    for (const [reaction, count] of Object.entries(data.reactions)) {
-                        const button = document.createElement('button');
-                        button.textContent = `${reaction} ${count}`;
-                        button.onclick = () => addReaction(data.message_id, reaction);
-                        reactionsElement.appendChild(button);
-                    }
-                }
-            }
-        });
+        const currentTag = {{ current_tag|default(none, true)|tojson }};
     </script>
+    <script src="{{ url_for('static', filename='board.js') }}" defer></script>
 </body>
 </html>
 '''
@@ -921,42 +1102,7 @@ LOGIN_HTML = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Login - Rad Message Board</title>
-    <style>
-        body {
-            font-family: 'Courier New', monospace;
-            background-color: #000;
-            color: #fff;
-            margin: 0;
-            padding: 20px;
-        }
-        .container {
-            max-width: 400px;
-            margin: 0 auto;
-        }
-        h1 {
-            border-bottom: 4px solid #fff;
-            padding-bottom: 10px;
-        }
-        form {
-            border: 4px solid #fff;
-            padding: 20px;
-        }
-        input[type="text"], input[type="password"] {
-            width: 100%;
-            padding: 10px;
-            margin-bottom: 10px;
-            background-color: #000;
-            color: #fff;
-            border: 2px solid #fff;
-        }
-        input[type="submit"] {
-            background-color: #fff;
-            color: #000;
-            border: none;
-            padding: 10px 20px;
-            cursor: pointer;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ url_for('static', filename='auth.css') }}">
 </head>
 <body>
     <div class="container">
@@ -978,42 +1124,7 @@ REGISTER_HTML = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Register - Rad Message Board</title>
-    <style>
-        body {
-            font-family: 'Courier New', monospace;
-            background-color: #000;
-            color: #fff;
-            margin: 0;
-            padding: 20px;
-        }
-        .container {
-            max-width: 400px;
-            margin: 0 auto;
-        }
-        h1 {
-            border-bottom: 4px solid #fff;
-            padding-bottom: 10px;
-        }
-        form {
-            border: 4px solid #fff;
-            padding: 20px;
-        }
-        input[type="text"], input[type="password"], select {
-            width: 100%;
-            padding: 10px;
-            margin-bottom: 10px;
-            background-color: #000;
-            color: #fff;
-            border: 2px solid #fff;
-        }
-        input[type="submit"] {
-            background-color: #fff;
-            color: #000;
-            border: none;
-            padding: 10px 20px;
-            cursor: pointer;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ url_for('static', filename='auth.css') }}">
 </head>
 <body>
     <div class="container">
@@ -1043,47 +1154,7 @@ PROFILE_HTML = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{{ user[1] }}'s Profile - Rad Message Board</title>
-    <style>
-        body {
-            font-family: 'Courier New', monospace;
-            background-color: #000;
-            color: #fff;
-            margin: 0;
-            padding: 20px;
-        }
-        .container {
-            max-width: 800px;
-            margin: 0 auto;
-        }
-        h1, h2 {
-            border-bottom: 4px solid #fff;
-            padding-bottom: 10px;
-        }
-        .message {
-            border: 4px solid #fff;
-            padding: 10px;
-            margin-bottom: 20px;
-        }
-        .message-content {
-            margin-bottom: 10px;
-            word-wrap: break-word;
-        }
-        .message-meta {
-            font-size: 0.8em;
-            color: #ccc;
-        }
-        .avatar {
-            font-size: 2em;
-            margin-right: 10px;
-        }
-        .nav {
-            margin-bottom: 20px;
-        }
-        .nav a {
-            color: #fff;
-            margin-right: 10px;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ url_for('static', filename='profile.css') }}">
 </head>
 <body>
     <div class="container">
@@ -1098,7 +1169,7 @@ PROFILE_HTML = '''
             <div class="message">
                 <div class="message-content">{{ message[1] }}</div>
                 {% if message[2] %}
-                    <img src="data:image/png;base64,{{ message[2] }}" alt="Generated Image" style="max-width: 100%; height: auto;">
+                    <img src="{{ url_for('static', filename=message[2]) }}" alt="Generated Image" loading="lazy" decoding="async" style="max-width: 100%; height: auto;">
                 {% endif %}
                 {% if message[3] %}
                     <div class="video-container">
@@ -1108,11 +1179,27 @@ PROFILE_HTML = '''
                 <div class="message-meta">Posted on {{ message[4] }}</div>
             </div>
         {% endfor %}
+        {% if older_before %}
+            <a class="load-more" href="{{ url_for('profile', username=user[1], before=older_before) }}">Older posts</a>
+        {% endif %}
     </div>
 </body>
 </html>
 '''
 
+# Register the inline templates with the Jinja loader so each one is
+# lexed and compiled once and then served from the environment's template
+# cache, instead of being re-parsed by render_template_string per request.
+app.jinja_loader = ChoiceLoader([
+    DictLoader({
+        'board.html': BASE_HTML,
+        'login.html': LOGIN_HTML,
+        'register.html': REGISTER_HTML,
+        'profile.html': PROFILE_HTML,
+    }),
+    app.jinja_loader,
+])
+
 @socketio.on('connect')
 def handle_connect():
     print('Client connected')
@@ -0,0 +1,10 @@
+// Single Socket.IO connection shared by every script on the page.
+// Calling io() per script (or per widget) opens a fresh Engine.IO
+// handshake each time; routing everything through this getter means one
+// socket per page no matter how many consumers subscribe.
+function getBoardSocket() {
+    if (!window._boardSocket) {
+        window._boardSocket = io();
+    }
+    return window._boardSocket;
+}
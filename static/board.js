@@ -0,0 +1,526 @@
+const socket = getBoardSocket();
+
+// Debug logging in the socket hot paths; serializing payloads (let
+// alone outerHTML) per inbound message is measurable under bursts
+const DEBUG = false;
+
+// Upper bound on rendered messages in a long-lived tab; DOM node count
+// dominates layout cost once the feed grows into the thousands
+const MAX_RENDERED_MESSAGES = 300;
+
+// Collect a whole batch into a DocumentFragment and attach once:
+// one reflow for the batch instead of one per message
+function appendMessagesBatch(messages, container) {
+    const frag = document.createDocumentFragment();
+    messages.forEach(message => frag.appendChild(createMessageElement(message)));
+    container.appendChild(frag);
+}
+
+function loadMore() {
+    const container = document.getElementById('messages-container');
+    const last = container.lastElementChild;
+    let url = '/load_more';
+    const params = new URLSearchParams();
+    if (last) params.set('before', last.dataset.messageId);
+    if (currentTag) params.set('tag', currentTag);
+    fetch(url + '?' + params.toString())
+        .then(response => response.json())
+        .then(messages => {
+            appendMessagesBatch(messages, container);
+            if (messages.length === 0) {
+                document.getElementById('load-more').style.display = 'none';
+            }
+        })
+        .catch(error => console.error('Error:', error));
+}
+
+let pendingImageJobId = null;
+let pendingVideoJobId = null;
+
+function generateImage() {
+    const prompt = document.getElementById('image-prompt').value;
+    fetch('/generate_image', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/x-www-form-urlencoded',
+        },
+        body: 'prompt=' + encodeURIComponent(prompt)
+    })
+    .then(response => response.json())
+    .then(data => {
+        pendingImageJobId = data.job_id;
+    })
+    .catch(error => console.error('Error:', error));
+}
+
+socket.on('image_ready', function(data) {
+    if (data.job_id !== pendingImageJobId) return;
+    pendingImageJobId = null;
+    if (data.error) {
+        alert('Error: ' + data.error);
+    } else {
+        const img = document.getElementById('generated-image');
+        img.src = '/static/' + data.image_path;
+        img.style.display = 'block';
+        document.getElementById('image-path').value = data.image_path;
+    }
+});
+
+function generateVideo() {
+    const prompt = document.getElementById('video-prompt').value;
+    const aspectRatio = document.getElementById('video-aspect-ratio').value;
+    fetch('/generate_video', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/x-www-form-urlencoded',
+        },
+        body: 'prompt=' + encodeURIComponent(prompt) + '&aspect_ratio=' + encodeURIComponent(aspectRatio)
+    })
+    .then(response => response.json())
+    .then(data => {
+        pendingVideoJobId = data.job_id;
+    })
+    .catch(error => console.error('Error:', error));
+}
+
+socket.on('video_started', function(data) {
+    if (data.job_id !== pendingVideoJobId) return;
+    if (data.error) {
+        pendingVideoJobId = null;
+        alert('Error: ' + data.error);
+    } else {
+        document.getElementById('video-id').value = data.generation_id;
+        document.getElementById('video-status').textContent = 'Video status: generating...';
+        scheduleVideoPoll(data.generation_id, 0);
+    }
+});
+
+socket.on('video_generation_done', function(data) {
+    if (data.job_id !== pendingVideoJobId) return;
+    pendingVideoJobId = null;
+    cancelVideoPoll();
+    if (data.error || !data.video_url) {
+        document.getElementById('video-status').textContent = 'Error: ' + (data.error || 'no video URL');
+    } else {
+        const video = document.getElementById('generated-video');
+        video.src = data.video_url;
+        video.style.display = 'block';
+        document.getElementById('video-status').textContent = 'Video generation completed!';
+    }
+});
+
+// Fallback polling for when the video_generation_done push is
+// missed (e.g. a dropped socket). Delays back off roughly along a
+// Fibonacci curve so polls cluster early, where most jobs finish.
+const videoPollSchedule = [3000, 5000, 8000, 13000, 21000, 34000];
+let videoPollTimer = null;
+
+function scheduleVideoPoll(generationId, attempt) {
+    const delay = videoPollSchedule[Math.min(attempt, videoPollSchedule.length - 1)];
+    videoPollTimer = setTimeout(() => checkVideoStatus(generationId, attempt), delay);
+}
+
+function cancelVideoPoll() {
+    clearTimeout(videoPollTimer);
+    videoPollTimer = null;
+}
+
+function checkVideoStatus(generationId, attempt = 0) {
+    fetch('/check_video_status/' + generationId)
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                console.error('Error:', data.error);
+                document.getElementById('video-status').textContent = 'Error: ' + data.error;
+            } else {
+                if (DEBUG) console.log('Video status:', data.status);
+                document.getElementById('video-status').textContent = 'Video status: ' + data.status;
+
+                if (data.status === 'completed' && data.video_url) {
+                    cancelVideoPoll();
+                    const video = document.getElementById('generated-video');
+                    video.src = data.video_url;
+                    video.style.display = 'block';
+                    document.getElementById('video-status').textContent = 'Video generation completed!';
+                } else if (data.status === 'dreaming' || data.status === 'processing' || data.status === 'queued') {
+                    scheduleVideoPoll(generationId, attempt + 1);
+                }
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            document.getElementById('video-status').textContent = 'An error occurred while checking the video status';
+        });
+}
+
+// Trailing-edge debounce per (message, reaction) so mashing a
+// button sends one request; the count is bumped optimistically
+// and the socket echo settles the real value
+const reactionTimers = new Map();
+
+function addReaction(messageId, reaction) {
+    const messageElement = findMessageElement(messageId);
+    if (messageElement && messageElement._reactionButtons) {
+        const button = messageElement._reactionButtons.get(reaction);
+        if (button) {
+            const parts = button.firstChild.nodeValue.trim().split(' ');
+            const count = parseInt(parts[parts.length - 1], 10);
+            if (!isNaN(count)) {
+                button.firstChild.nodeValue = reaction + ' ' + (count + 1);
+            }
+        }
+    }
+    const key = messageId + ':' + reaction;
+    clearTimeout(reactionTimers.get(key));
+    reactionTimers.set(key, setTimeout(() => {
+        reactionTimers.delete(key);
+        fetch(`/add_reaction/${messageId}/${reaction}`, {method: 'GET'})
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Network response was not ok');
+                }
+            })
+            .catch(error => console.error('Error:', error));
+    }, 150));
+}
+
+// Built with createElement/textContent rather than innerHTML: no
+// HTML parser run per message and user-supplied fields can't
+// inject markup
+function createMessageElement(message) {
+    if (DEBUG) console.log("Creating message element:", message);
+    const messageElement = document.createElement('div');
+    messageElement.className = 'message';
+    messageElement.dataset.messageId = message.id;
+
+    // Prefer the fragments the server already escaped and assembled;
+    // fall back to element-by-element construction for payloads
+    // (or cached pages) that predate them
+    if (message.content_html) {
+        messageElement.insertAdjacentHTML('beforeend', message.content_html);
+    } else {
+        const contentDiv = document.createElement('div');
+        contentDiv.className = 'message-content';
+        contentDiv.textContent = message.content;
+        messageElement.appendChild(contentDiv);
+    }
+
+    if (message.image_path) {
+        const img = document.createElement('img');
+        img.src = '/static/' + message.image_path;
+        img.alt = 'Generated Image';
+        img.loading = 'lazy';
+        img.decoding = 'async';
+        img.style.maxWidth = '100%';
+        img.style.height = 'auto';
+        messageElement.appendChild(img);
+    }
+
+    if (message.video_url) {
+        const videoContainer = document.createElement('div');
+        videoContainer.className = 'video-container';
+        const video = document.createElement('video');
+        video.src = message.video_url;
+        video.controls = true;
+        video.style.maxWidth = '100%';
+        video.style.height = 'auto';
+        videoContainer.appendChild(video);
+        messageElement.appendChild(videoContainer);
+    }
+
+    if (message.meta_html) {
+        messageElement.insertAdjacentHTML('beforeend', message.meta_html);
+    } else {
+        const metaDiv = document.createElement('div');
+        metaDiv.className = 'message-meta';
+        const avatarSpan = document.createElement('span');
+        avatarSpan.className = 'avatar';
+        avatarSpan.textContent = message.avatar;
+        metaDiv.appendChild(avatarSpan);
+        metaDiv.appendChild(document.createTextNode('Posted by '));
+        const profileLink = document.createElement('a');
+        profileLink.href = '/profile/' + encodeURIComponent(message.username);
+        profileLink.textContent = message.username;
+        metaDiv.appendChild(profileLink);
+        metaDiv.appendChild(document.createTextNode(' on ' + message.timestamp));
+        messageElement.appendChild(metaDiv);
+    }
+
+    if (message.tags_html) {
+        messageElement.insertAdjacentHTML('beforeend', message.tags_html);
+    } else {
+        const tagsDiv = document.createElement('div');
+        tagsDiv.className = 'message-tags';
+        (message.tags || []).forEach(tag => {
+            const tagSpan = document.createElement('span');
+            tagSpan.className = 'tag';
+            tagSpan.textContent = tag;
+            tagsDiv.appendChild(tagSpan);
+        });
+        messageElement.appendChild(tagsDiv);
+    }
+
+    const reactionsDiv = document.createElement('div');
+    reactionsDiv.className = 'reactions';
+    messageElement.appendChild(reactionsDiv);
+
+    const commentsDiv = document.createElement('div');
+    commentsDiv.className = 'comments-section';
+    messageElement.appendChild(commentsDiv);
+
+    const commentForm = document.createElement('form');
+    commentForm.className = 'comment-form';
+    commentForm.action = '/post_comment/' + message.id;
+    commentForm.method = 'post';
+    const commentInput = document.createElement('input');
+    commentInput.type = 'text';
+    commentInput.name = 'content';
+    commentInput.placeholder = 'Add a comment';
+    commentInput.required = true;
+    commentForm.appendChild(commentInput);
+    const commentSubmit = document.createElement('input');
+    commentSubmit.type = 'submit';
+    commentSubmit.value = 'Post Comment';
+    commentForm.appendChild(commentSubmit);
+    messageElement.appendChild(commentForm);
+
+    // Messages from /load_more carry their comments and reaction counts;
+    // socket messages are brand new and have neither
+    (message.comments || []).forEach(comment => renderComment(comment, messageElement));
+    if (message.reactions && Object.keys(message.reactions).length) {
+        renderReactions(message.id, message.reactions, messageElement);
+    }
+
+    messageIndex.set(Number(message.id), messageElement);
+
+    return messageElement;
+}
+
+// Incoming socket events are queued and drained once per animation frame
+// so a burst of messages costs one DOM insertion/layout, not one each
+const pendingMessages = [];
+const pendingComments = [];
+const pendingReactions = new Map();  // message_id -> latest counts
+let rafScheduled = false;
+
+// fastdom-style scheduler: DOM reads queued with measure() all run
+// before DOM writes queued with mutate(), inside the same rAF as the
+// event flusher, so a read never lands on a dirty tree mid-update and
+// forces a synchronous layout
+const measureQueue = [];
+const mutateQueue = [];
+
+const scheduler = {
+    measure(fn) {
+        measureQueue.push(fn);
+        scheduleFlush();
+    },
+    mutate(fn) {
+        mutateQueue.push(fn);
+        scheduleFlush();
+    }
+};
+
+function scheduleFlush() {
+    if (!rafScheduled) {
+        rafScheduled = true;
+        requestAnimationFrame(flushUpdates);
+    }
+}
+
+// id -> element index so event handlers don't pay an attribute-selector
+// scan of the whole feed per lookup. Server-rendered messages are
+// adopted lazily on first access; the observer below evicts removed ones.
+const messageIndex = new Map();
+
+function findMessageElement(messageId) {
+    const key = Number(messageId);
+    let el = messageIndex.get(key);
+    if (!el) {
+        el = document.querySelector(`[data-message-id="${messageId}"]`);
+        if (el) messageIndex.set(key, el);
+    }
+    return el;
+}
+
+const messageIndexObserver = new MutationObserver(mutations => {
+    mutations.forEach(mutation => {
+        mutation.removedNodes.forEach(node => {
+            if (node.nodeType === 1 && node.dataset && node.dataset.messageId) {
+                messageIndex.delete(Number(node.dataset.messageId));
+            }
+        });
+    });
+});
+const messagesContainerForIndex = document.getElementById('messages-container');
+if (messagesContainerForIndex) {
+    messageIndexObserver.observe(messagesContainerForIndex, { childList: true });
+
+    // One delegated listener for every reaction button on the board, so
+    // thousands of messages don't mean thousands of bound handlers
+    messagesContainerForIndex.addEventListener('click', e => {
+        const button = e.target.closest('button[data-reaction]');
+        if (button) {
+            addReaction(button.dataset.messageId, button.dataset.reaction);
+        }
+    });
+
+    // Comments post over fetch instead of a full navigation; the
+    // new_comment broadcast is the single source of truth for the DOM
+    messagesContainerForIndex.addEventListener('submit', e => {
+        const form = e.target.closest('form.comment-form');
+        if (!form) return;
+        e.preventDefault();
+        fetch(form.action, { method: 'POST', body: new FormData(form) })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Comment post failed: ' + response.status);
+                }
+                // Only clear the field once the server has the comment
+                form.reset();
+            })
+            .catch(error => console.error('Error:', error));
+    });
+}
+
+function flushUpdates() {
+    rafScheduled = false;
+
+    // Read phase: queued measures plus the element lookups the pending
+    // comment/reaction updates will write into
+    measureQueue.splice(0).forEach(fn => fn());
+    const messagesContainer = document.getElementById('messages-container');
+    const commentTargets = pendingComments.splice(0).map(
+        comment => [comment, findMessageElement(comment.message_id)]);
+    const reactionTargets = [];
+    pendingReactions.forEach((reactions, messageId) => {
+        reactionTargets.push([messageId, reactions, findMessageElement(messageId)]);
+    });
+    pendingReactions.clear();
+
+    // Write phase
+    if (pendingMessages.length) {
+        // The fragment is prepended as a block, so fill it newest-first
+        // (reverse arrival order) to keep the feed newest-at-the-top
+        const frag = document.createDocumentFragment();
+        for (let i = pendingMessages.length - 1; i >= 0; i--) {
+            frag.appendChild(createMessageElement(pendingMessages[i]));
+        }
+        pendingMessages.length = 0;
+        messagesContainer.insertBefore(frag, messagesContainer.firstChild);
+        // Cap the live DOM: new messages push the oldest off the bottom
+        // so a long-lived tab doesn't accumulate an unbounded feed.
+        // Load More re-fetches anything trimmed here.
+        while (messagesContainer.childElementCount > MAX_RENDERED_MESSAGES) {
+            messagesContainer.removeChild(messagesContainer.lastElementChild);
+        }
+    }
+    commentTargets.forEach(([comment, el]) => renderComment(comment, el));
+    reactionTargets.forEach(([messageId, reactions, el]) => renderReactions(messageId, reactions, el));
+    mutateQueue.splice(0).forEach(fn => fn());
+}
+
+// The server coalesces board events into 'batch' frames; fan each one
+// back out to its queueing handler here
+const batchHandlers = {
+    new_message: function(message) {
+        if (DEBUG) console.log("Received new message:", message);
+        pendingMessages.push(message);
+        scheduleFlush();
+    },
+    new_comment: function(comment) {
+        pendingComments.push(comment);
+        scheduleFlush();
+    },
+    reaction_update: function(data) {
+        pendingReactions.set(data.message_id, data.reactions);
+        scheduleFlush();
+    }
+};
+
+socket.on('batch', function(events) {
+    events.forEach(ev => {
+        const handler = batchHandlers[ev.type];
+        if (handler) handler(ev.payload);
+    });
+});
+
+function renderComment(comment, messageElement) {
+    if (messageElement) {
+        const commentsSection = messageElement.querySelector('.comments-section');
+        const newCommentElement = document.createElement('div');
+        newCommentElement.className = 'comment';
+        const commentContent = document.createElement('div');
+        commentContent.className = 'comment-content';
+        commentContent.textContent = comment.content;
+        newCommentElement.appendChild(commentContent);
+        const commentMeta = document.createElement('div');
+        commentMeta.className = 'comment-meta';
+        const commentAvatar = document.createElement('span');
+        commentAvatar.className = 'avatar';
+        commentAvatar.textContent = comment.avatar;
+        commentMeta.appendChild(commentAvatar);
+        commentMeta.appendChild(document.createTextNode(
+            'Posted by ' + comment.username + ' on ' + comment.timestamp));
+        newCommentElement.appendChild(commentMeta);
+        commentsSection.appendChild(newCommentElement);
+    }
+}
+
+socket.on('video_ready', function(data) {
+    let messageElement = null;
+    let hasVideo = false;
+    scheduler.measure(() => {
+        messageElement = findMessageElement(data.message_id);
+        hasVideo = !!(messageElement && messageElement.querySelector('.video-container'));
+    });
+    scheduler.mutate(() => {
+        if (!messageElement || hasVideo) return;
+        const container = document.createElement('div');
+        container.className = 'video-container';
+        const video = document.createElement('video');
+        video.src = data.video_url;
+        video.controls = true;
+        video.style.maxWidth = '100%';
+        video.style.height = 'auto';
+        container.appendChild(video);
+        messageElement.querySelector('.message-content').after(container);
+    });
+});
+
+// Diff the new counts against the buttons already on screen and
+// touch only what changed instead of rebuilding the whole row
+function renderReactions(messageId, reactions, messageElement) {
+    if (!messageElement) return;
+    const reactionsElement = messageElement.querySelector('.reactions');
+    if (!reactionsElement) return;
+
+    if (!messageElement._reactionButtons) {
+        messageElement._reactionButtons = new Map();
+        // Adopt any server-rendered buttons so they aren't duplicated
+        for (const btn of reactionsElement.children) {
+            messageElement._reactionButtons.set(btn.textContent.trim().split(' ')[0], btn);
+        }
+    }
+    const buttons = messageElement._reactionButtons;
+
+    for (const [reaction, count] of Object.entries(reactions)) {
+        let button = buttons.get(reaction);
+        if (button) {
+            button.firstChild.nodeValue = reaction + ' ' + count;
+        } else {
+            button = document.createElement('button');
+            button.textContent = reaction + ' ' + count;
+            button.dataset.messageId = messageId;
+            button.dataset.reaction = reaction;
+            reactionsElement.appendChild(button);
+            buttons.set(reaction, button);
+        }
+    }
+    for (const [reaction, button] of buttons) {
+        if (!(reaction in reactions)) {
+            button.remove();
+            buttons.delete(reaction);
+        }
+    }
+}